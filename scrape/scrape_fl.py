@@ -24,9 +24,9 @@ class SenDetail(Page):
         return self.obj.links[0]["url"]
 
     def scrape(self):
-        email = self.doc.xpath('//a[contains(@href, "mailto:")]')[0].get("href").split(":")[-1]
+        email = self.xpath('//a[contains(@href, "mailto:")]')[0].get("href").split(":")[-1]
         self.obj.capitol_office.email = email
-        self.obj.image = str(self.doc.xpath('//div[@id="sidebar"]//img/@src').pop())
+        self.obj.image = self.absolute(self.xpath('//div[@id="sidebar"]//img/@src').pop())
 
 
 class SenContactDetail(ListPage):
@@ -76,21 +76,29 @@ class SenList(ListPage):
     url = "http://www.flsenate.gov/Senators/"
     list_xpath = "//a[@class='senatorLink']"
     detail_pages = [SenDetail, SenContactDetail]
+    fields = {
+        "name": ".//text()",
+        "district": "string(../../td[1])",
+        "party": "string(../../td[2])",
+    }
 
     def handle_list_item(self, item):
-        name = " ".join(item.xpath(".//text()"))
+        data = self.extract(item)
+        name = " ".join(data["name"])
         name = re.sub(r"\s+", " ", name).replace(" ,", ",").strip()
 
         if "Vacant" in name:
             return
 
-        district = item.xpath("string(../../td[1])")
-        party = item.xpath("string(../../td[2])")
         leg_url = item.get("href")
 
         name = fix_name(name)
         leg = Person(
-            name=str(name), state="fl", party=str(party), district=str(district), chamber="upper"
+            name=str(name),
+            state="fl",
+            party=data["party"],
+            district=data["district"],
+            chamber="upper",
         )
         leg.add_link(leg_url)
         leg.add_source(self.url)
@@ -1,9 +1,74 @@
+import os
+import threading
+import warnings
 import scrapelib
+import lxml.etree
 import lxml.html
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
+from urllib.parse import urljoin
+from requests.adapters import HTTPAdapter
 
+# size of the keep-alive connection pool kept per host, also caps concurrent fetches
+POOL_SIZE = 20
+# number of parsed documents kept around for reuse by subpages
+DOC_CACHE_SIZE = 256
 
-class Page(scrapelib.Scraper):
+# default request rate for the whole scrape, scrapelib's default (what each page used on its own)
+REQUESTS_PER_MINUTE = 60
+
+# bytes read from the network per chunk fed to the parser
+CHUNK_SIZE = 65536
+
+# scrapelib.Scraper methods that can be called directly on a Page
+SCRAPER_METHODS = frozenset(
+    ("get", "post", "put", "patch", "delete", "head", "options", "request", "urlretrieve")
+)
+
+_local = threading.local()
+
+
+class _Scraper(scrapelib.Scraper):
+    """ scrapelib.Scraper whose throttle also holds when requests come from several threads """
+
+    def __init__(self, *args, **kwargs):
+        self._throttle_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _throttle(self):
+        # the lock is held while sleeping so that waiting threads are spaced out too
+        with self._throttle_lock:
+            super()._throttle()
+
+
+def _html_parser():
+    # feed parsers hold the document being built, so each thread keeps its own
+    # (skipping the id index, never queried here, and libxml2's size limits)
+    parser = getattr(_local, "parser", None)
+    if parser is None:
+        parser = _local.parser = lxml.html.HTMLParser(collect_ids=False, huge_tree=True)
+    return parser
+
+
+def _fetch_and_parse(url):
+    print(f"fetching {url}")
+    parser = _html_parser()
+    try:
+        # parse while the body is still downloading instead of buffering it first
+        with Page.get_scraper().get(url, stream=True) as resp:
+            # cached responses are already in memory, only live ones can be streamed
+            chunks = (resp.content,) if resp.fromcache else resp.iter_content(CHUNK_SIZE)
+            for chunk in chunks:
+                parser.feed(chunk)
+    except Exception:
+        # discard the half-built document along with its parser
+        _local.parser = None
+        raise
+    return parser.close()
+
+
+class Page:
     """
     Base class for scrapers.
 
@@ -13,25 +78,89 @@ class Page(scrapelib.Scraper):
         can be provided at class level or passed in
     obj:
         passed in if this is a subpage
+
+    Requests go through one scrapelib.Scraper shared by all pages, its request
+    methods (see SCRAPER_METHODS) are available directly on every page.
     """
 
+    _scraper = None
+    # parsed documents keyed by URL, shared by every page and bounded in size
+    _doc_cache = staticmethod(lru_cache(maxsize=DOC_CACHE_SIZE)(_fetch_and_parse))
+
     def __init__(self, *, url=None, obj=None):
-        super().__init__()
         self.obj = obj
-        if url or not hasattr(self, "url"):
+        # look on the class so this doesn't go through __getattr__
+        if url or not hasattr(type(self), "url"):
             self.url = url
         self.doc = None
 
-    @lru_cache(maxsize=None)
+    @property
+    def doc(self):
+        return self._doc
+
+    @doc.setter
+    def doc(self, doc):
+        self._doc = doc
+        self._evaluator = None
+        self._base_url = None
+
+    def absolute(self, href):
+        """
+        make a link taken from self.doc absolute, links are not rewritten on parse
+
+        like make_links_absolute, a <base href> in the document takes precedence over self.url
+        """
+        if self._base_url is None:
+            base = self.doc.find(".//base[@href]") if self.doc is not None else None
+            self._base_url = urljoin(self.url, base.get("href")) if base is not None else self.url
+        return urljoin(self._base_url, href)
+
+    def xpath(self, expr, **variables):
+        """
+        evaluate an XPath expression against self.doc
+
+        one XPathEvaluator is created per document and reused for every query on it
+        """
+        if self._evaluator is None:
+            self._evaluator = lxml.etree.XPathEvaluator(self.doc)
+        return self._evaluator(expr, **variables)
+
+    def __getattr__(self, name):
+        # only called for attributes the page doesn't have, request methods go to the scraper
+        if name not in SCRAPER_METHODS:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        return getattr(self.get_scraper(), name)
+
+    @property
+    def scraper(self):
+        """ the shared scrapelib.Scraper, for anything not in SCRAPER_METHODS """
+        return self.get_scraper()
+
+    @classmethod
+    def get_scraper(cls):
+        """
+        scraper shared by every page so connections are kept alive across requests
+        """
+        if Page._scraper is None:
+            # one limit shared by every page and thread, SCRAPE_REQUESTS_PER_MINUTE=0 turns it off
+            rpm = int(os.environ.get("SCRAPE_REQUESTS_PER_MINUTE", REQUESTS_PER_MINUTE))
+            scraper = _Scraper(requests_per_minute=rpm)
+            adapter = HTTPAdapter(pool_maxsize=POOL_SIZE)
+            scraper.mount("http://", adapter)
+            scraper.mount("https://", adapter)
+            # opt-in on-disk cache for development, cached pages are reused as-is
+            cache_dir = os.environ.get("SCRAPE_CACHE_DIR")
+            if cache_dir:
+                scraper.cache_storage = scrapelib.FileCache(cache_dir)
+                scraper.cache_write_only = False
+            Page._scraper = scraper
+        return Page._scraper
+
     def lxml(self, url):
         """
         method that actually fetches the data, might be called by a child class
         """
-        print(f"fetching {url} via {self.__class__.__name__}")
-        html = self.get(url)
-        doc = lxml.html.fromstring(html.content)
-        doc.make_links_absolute(url)
-        return doc
+        return self._doc_cache(url)
 
     def fetch(self, *, using=None):
         if not self.url:
@@ -42,15 +171,101 @@ class Page(scrapelib.Scraper):
 
 
 class ListPage(Page):
+    """
+    Base class for pages that list many items.
+
+    list_xpath:
+        XPath expression selecting the items
+    list_root_xpath:
+        optional XPath to a single element that contains all of the items, when set
+        list_xpath (or list_tag) is evaluated relative to it, e.g. "./tr"
+    list_tag:
+        alternative to list_xpath, items are the elements with this tag that
+        list_filter() accepts, found with a plain walk of the document
+    fields:
+        optional dict of name -> XPath relative to an item, see extract()
+    detail_pages:
+        Page classes scraped for each object from handle_list_item(), their documents
+        are fetched concurrently (pages with the same URL share one fetch, unless the
+        class overrides fetch(), which is then called in a worker thread)
+    """
+
+    list_root_xpath = None
+    list_tag = None
+    fields = {}
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # compile XPath expressions once per class instead of on every fetch
+        for attr in ("list_xpath", "list_root_xpath"):
+            expr = getattr(cls, attr, None)
+            if isinstance(expr, str):
+                setattr(cls, f"_{attr}_compiled", lxml.etree.XPath(expr))
+        cls._fields_compiled = {name: lxml.etree.XPath(expr) for name, expr in cls.fields.items()}
+        list_xpath = getattr(cls, "list_xpath", None)
+        if cls.list_root_xpath and isinstance(list_xpath, str) and list_xpath.startswith("//"):
+            warnings.warn(
+                f"{cls.__name__}.list_xpath starts with // and so searches the whole "
+                "document, ignoring list_root_xpath"
+            )
+
+    def _evaluate(self, attr, element):
+        """ evaluate the XPath in attr, using the copy compiled with the class if possible """
+        expr = getattr(self, attr)
+        compiled = getattr(self, f"_{attr}_compiled", None)
+        if compiled is not None and compiled.path == expr:
+            return compiled(element)
+        # expression was set dynamically, evaluate the string directly
+        elif element is self.doc:
+            return self.xpath(expr)
+        else:
+            return element.xpath(expr)
+
     def _get_items(self):
         if self.doc is None:
             self.doc = self.lxml(self.url)
 
-        items = self.doc.xpath(self.list_xpath)
+        root = self.doc
+        if self.list_root_xpath:
+            roots = self._evaluate("list_root_xpath", self.doc)
+            if not roots:
+                raise ValueError(f"no root for {self.list_root_xpath} on {self.url}")
+            root = roots[0]
+
+        if self.list_tag:
+            items = [el for el in root.iter(self.list_tag) if self.list_filter(el)]
+            if not items:
+                raise ValueError(f"no items for {self.list_tag} on {self.url}")
+            return self._absolutize(items)
+
+        items = self._evaluate("list_xpath", root)
         if not items:
             raise ValueError(f"no items for {self.list_xpath} on {self.url}")
+        return self._absolutize(items)
+
+    def _absolutize(self, items):
+        # only the selected items get their links rewritten, not the whole document
+        for item in items:
+            if isinstance(item, lxml.html.HtmlMixin):
+                item.make_links_absolute(self.url, resolve_base_href=False)
         return items
 
+    def extract(self, item):
+        """
+        evaluate every expression in fields against item, returning a dict of the results
+
+        string results (e.g. from string() or normalize-space()) are returned as plain str
+        """
+        data = {}
+        for name, xpath in self._fields_compiled.items():
+            value = xpath(item)
+            data[name] = str(value) if isinstance(value, str) else value
+        return data
+
+    def list_filter(self, element):
+        """ used with list_tag, return False to skip an element """
+        return True
+
     def scrape(self):
         """ called when using ListPage as a subpage """
         for item in self._get_items():
@@ -58,11 +273,48 @@ class ListPage(Page):
 
     def yield_objects(self):
         """ called as entrypoint, yields resulting items """
-        for item in self._get_items():
-            obj = self.handle_list_item(item)
-            if obj:
-                for PageCls in self.detail_pages:
-                    page = PageCls(obj=obj)
-                    page.fetch(using=self)
-                    page.scrape()
-                yield obj
+        with ThreadPoolExecutor(max_workers=POOL_SIZE) as executor:
+            # detail pages for up to POOL_SIZE objects are fetched ahead of the one being
+            # yielded, so objects stream out in list order and only that many docs are held
+            pending = deque()
+            # detail pages in the window that share a URL share one fetch, counted by use
+            fetches_by_url = {}
+            uses_by_url = Counter()
+            for item in self._get_items():
+                obj = self.handle_list_item(item)
+                if obj:
+                    fetches = [
+                        self._start_fetch(executor, PageCls(obj=obj), fetches_by_url, uses_by_url)
+                        for PageCls in self.detail_pages
+                    ]
+                    pending.append((obj, fetches))
+                    if len(pending) >= POOL_SIZE:
+                        yield self._scrape_detail_pages(
+                            *pending.popleft(), fetches_by_url, uses_by_url
+                        )
+            while pending:
+                yield self._scrape_detail_pages(*pending.popleft(), fetches_by_url, uses_by_url)
+
+    def _start_fetch(self, executor, page, fetches_by_url, uses_by_url):
+        """ returns (page, future, shared) with page's document being fetched by executor """
+        if type(page).fetch is not Page.fetch:
+            # a page with its own fetch() gets it called as usual, it can't share a fetch
+            return page, executor.submit(page.fetch, using=self), False
+        if not page.url:
+            page.url = page.get_url()
+        if page.url not in fetches_by_url:
+            fetches_by_url[page.url] = executor.submit(self.lxml, page.url)
+        uses_by_url[page.url] += 1
+        return page, fetches_by_url[page.url], True
+
+    def _scrape_detail_pages(self, obj, fetches, fetches_by_url, uses_by_url):
+        for page, fetch, shared in fetches:
+            if shared:
+                page.doc = fetch.result()
+                uses_by_url[page.url] -= 1
+                if not uses_by_url[page.url]:
+                    del fetches_by_url[page.url], uses_by_url[page.url]
+            else:
+                fetch.result()
+            page.scrape()
+        return obj
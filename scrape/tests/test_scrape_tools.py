@@ -0,0 +1,137 @@
+import time
+import lxml.html
+import pytest
+import scrape_tools
+from scrape_tools import Page, ListPage
+
+
+def test_list_root_xpath_with_list_tag():
+    # list_xpath isn't needed (or a string) when items are found with list_tag
+    class TagPage(ListPage):
+        list_root_xpath = "//table"
+        list_xpath = None
+        list_tag = "tr"
+
+    assert TagPage.list_tag == "tr"
+
+
+def test_list_root_xpath_ignored_warning():
+    with pytest.warns(UserWarning, match="ignoring list_root_xpath"):
+
+        class DescendantPage(ListPage):
+            list_root_xpath = "//table"
+            list_xpath = "//tr"
+
+
+def test_absolute():
+    page = Page(url="http://page.example/p")
+    page.doc = lxml.html.fromstring("<html><body><a href='x'>x</a></body></html>")
+    assert page.absolute("x") == "http://page.example/x"
+
+
+def test_absolute_base_href():
+    page = Page(url="http://page.example/p")
+    page.doc = lxml.html.fromstring(
+        "<html><head><base href='http://other.example/dir/'></head>"
+        "<body><a href='x'>x</a></body></html>"
+    )
+    assert page.absolute("x") == "http://other.example/dir/x"
+    # same result as the links rewritten on list items
+    item = page.doc.find(".//a")
+    item.make_links_absolute(page.url, resolve_base_href=False)
+    assert item.get("href") == page.absolute("x")
+
+    # a new document brings its own base
+    page.doc = lxml.html.fromstring("<html><body></body></html>")
+    assert page.absolute("x") == "http://page.example/x"
+
+
+class DetailPage(Page):
+    def get_url(self):
+        return self.obj["url"]
+
+    def scrape(self):
+        self.obj.setdefault("docs", []).append(self.doc.text_content())
+
+
+class OtherDetailPage(DetailPage):
+    pass
+
+
+class FetchingDetailPage(DetailPage):
+    def fetch(self, *, using=None):
+        self.doc = lxml.html.fromstring("<p>custom</p>")
+
+
+def make_list_page(urls, detail_pages=(DetailPage,), fail=None):
+    """ returns a ListPage with one item per URL, whose fetches are recorded instead of made """
+
+    class StubListPage(ListPage):
+        list_xpath = "//li"
+
+        def handle_list_item(self, item):
+            return {"url": item.text}
+
+        def lxml(self, url):
+            self.fetched.append(url)
+            if url == fail:
+                raise ValueError(f"couldn't fetch {url}")
+            # finish out of order, later fetches first
+            time.sleep(0.01 * (len(urls) - int(url.rsplit("/", 1)[1])))
+            return lxml.html.fromstring(f"<p>{url}</p>")
+
+    StubListPage.detail_pages = list(detail_pages)
+    page = StubListPage(url="http://list.example/")
+    page.fetched = []
+    page.doc = lxml.html.fromstring("<ul>" + "".join(f"<li>{url}</li>" for url in urls) + "</ul>")
+    return page
+
+
+def test_yield_objects_in_order():
+    urls = [f"http://detail.example/{n}" for n in range(10)]
+    page = make_list_page(urls)
+    objs = list(page.yield_objects())
+    assert [obj["url"] for obj in objs] == urls
+    assert [obj["docs"] for obj in objs] == [[url] for url in urls]
+
+
+def test_yield_objects_shared_url():
+    urls = [f"http://detail.example/{n}" for n in range(3)]
+    page = make_list_page(urls, detail_pages=(DetailPage, OtherDetailPage))
+    objs = list(page.yield_objects())
+    assert [obj["docs"] for obj in objs] == [[url, url] for url in urls]
+    assert sorted(page.fetched) == urls
+
+
+def test_yield_objects_window(monkeypatch):
+    monkeypatch.setattr(scrape_tools, "POOL_SIZE", 1)
+    urls = ["http://detail.example/1", "http://detail.example/2"]
+    page = make_list_page(urls + urls[::-1])
+    objs = list(page.yield_objects())
+    assert [obj["docs"] for obj in objs] == [[url] for url in urls + urls[::-1]]
+    # each fetch was dropped once it was used, so the repeats went back to lxml()
+    assert page.fetched == urls + urls[::-1]
+
+    # while within the window, a repeated URL is only fetched once
+    monkeypatch.setattr(scrape_tools, "POOL_SIZE", 4)
+    page = make_list_page(urls + urls[::-1])
+    list(page.yield_objects())
+    assert sorted(page.fetched) == urls
+
+
+def test_yield_objects_fetch_error():
+    urls = [f"http://detail.example/{n}" for n in range(5)]
+    page = make_list_page(urls, fail="http://detail.example/2")
+    objs = []
+    with pytest.raises(ValueError, match="couldn't fetch"):
+        for obj in page.yield_objects():
+            objs.append(obj)
+    assert [obj["url"] for obj in objs] == urls[:2]
+
+
+def test_yield_objects_custom_fetch():
+    urls = [f"http://detail.example/{n}" for n in range(3)]
+    page = make_list_page(urls, detail_pages=(FetchingDetailPage,))
+    objs = list(page.yield_objects())
+    assert [obj["docs"] for obj in objs] == [["custom"]] * 3
+    assert page.fetched == []
@@ -1,4 +1,5 @@
 #!/bin/bash
 
-PYTHONPATH="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null && pwd )"
-poetry run pytest scripts --cov scripts --cov-report html --ds=tests.django_test_settings
+SCRIPTS_DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null && pwd )"
+export PYTHONPATH="$SCRIPTS_DIR:$SCRIPTS_DIR/../scrape"
+poetry run pytest scripts scrape --cov scripts --cov scrape --cov-report html --ds=tests.django_test_settings
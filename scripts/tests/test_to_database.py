@@ -1,34 +1,116 @@
+import copy
+import datetime
+import os
+import time
+import click
 import pytest
 import yaml
-from openstates.data.models import Person, Organization, Jurisdiction, Division
-from to_database import load_person, load_org
+from click.testing import CliRunner
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from functools import lru_cache
+from openstates.data.models import (
+    Person,
+    Organization,
+    Jurisdiction,
+    Division,
+    Post,
+    LegislativeSession,
+    Bill,
+    VoteEvent,
+)
+import to_database
+from to_database import (
+    load_person,
+    load_org,
+    load_directory,
+    sort_organizations,
+    CancelTransaction,
+    _split_unchanged,
+    _lapsed_ids,
+)
+
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:  # pragma: no cover
+    from yaml import SafeLoader
+
+
+@lru_cache(maxsize=64)
+def _parse_yaml(text):
+    return yaml.load(text, Loader=SafeLoader)
+
+
+def parse_yaml(text):
+    # each distinct string is parsed once, tests get a copy they're free to mutate
+    return copy.deepcopy(_parse_yaml(text))
+
+
+def subobject_tuples(manager, *fields):
+    # fetch a relation's rows in a single query to compare in Python
+    return sorted(manager.values_list(*fields))
+
+
+@pytest.fixture(scope="session")
+def base_db(django_db_setup, django_db_blocker):
+    # created once per session, each test runs in a transaction that's rolled back on top of it
+    # (only unblocked while creating & deleting, so tests still need their django_db marker)
+    with django_db_blocker.unblock():
+        Division.objects.bulk_create(
+            [Division(id="ocd-division/country:us/state:nc", name="NC")]
+            + [
+                Division(id=f"ocd-division/country:us/state:nc/sldl:{n}", name=str(n))
+                for n in range(1, 4)
+            ]
+        )
+        j, j2 = Jurisdiction.objects.bulk_create(
+            [
+                Jurisdiction(
+                    id="ocd-jurisdiction/country:us/state:nc/government",
+                    name="NC",
+                    division_id="ocd-division/country:us/state:nc",
+                ),
+                Jurisdiction(
+                    id="ocd-jurisdiction/country:us/state:nc/place:cary/government",
+                    name="Cary, NC",
+                ),
+            ]
+        )
+        o = Organization(name="House", classification="lower", jurisdiction=j)
+        Organization.objects.bulk_create(
+            [
+                o,
+                Organization(name="Executive", classification="executive", jurisdiction=j),
+                Organization(name="Democratic", classification="party"),
+                Organization(name="Republican", classification="party"),
+                Organization(
+                    name="Cary Town Government", classification="government", jurisdiction=j2
+                ),
+            ]
+        )
+        Post.objects.bulk_create(
+            [
+                Post(
+                    label=str(n),
+                    organization=o,
+                    division_id=f"ocd-division/country:us/state:nc/sldl:{n}",
+                )
+                for n in range(1, 4)
+            ]
+        )
 
+    yield
 
-def setup():
-    d = Division.objects.create(id="ocd-division/country:us/state:nc", name="NC")
-    j = Jurisdiction.objects.create(
-        id="ocd-jurisdiction/country:us/state:nc/government", name="NC", division=d
-    )
-    o = Organization.objects.create(name="House", classification="lower", jurisdiction=j)
-    for n in range(1, 4):
-        division = Division.objects.create(
-            id=f"ocd-division/country:us/state:nc/sldl:{n}", name=str(n)
-        )
-        o.posts.create(label=str(n), division=division)
-    Organization.objects.create(name="Executive", classification="executive", jurisdiction=j)
-    Organization.objects.create(name="Democratic", classification="party")
-    Organization.objects.create(name="Republican", classification="party")
-    j2 = Jurisdiction.objects.create(
-        id="ocd-jurisdiction/country:us/state:nc/place:cary/government", name="Cary, NC"
-    )
-    Organization.objects.create(
-        name="Cary Town Government", classification="government", jurisdiction=j2
-    )
+    with django_db_blocker.unblock():
+        Organization.objects.all().delete()
+        Jurisdiction.objects.all().delete()
+        Division.objects.all().delete()
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_basic_person_creation():
-    data = yaml.safe_load(
+    data = parse_yaml(
         """
     id: abcdefab-0000-1111-2222-1234567890ab
     name: Jane Smith
@@ -48,7 +130,8 @@ def test_basic_person_creation():
     assert p.current_role is None
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_basic_person_updates():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -57,7 +140,7 @@ def test_basic_person_updates():
     extras:
         something: special
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
 
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
@@ -81,7 +164,41 @@ def test_basic_person_updates():
     assert p.extras["something"] == "changed"
 
 
-@pytest.mark.django_db
+def person_updates(queries):
+    return [q["sql"] for q in queries if q["sql"].startswith('UPDATE "opencivicdata_person"')]
+
+
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
+def test_person_saved_once():
+    yaml_text = """
+    id: abcdefab-0000-1111-2222-1234567890ab
+    name: Jane Smith
+    links:
+        - url: https://example.com/jane
+    """
+    data = parse_yaml(yaml_text)
+
+    # creating shouldn't need a follow-up save
+    with CaptureQueriesContext(connection) as queries:
+        created, updated = load_person(data)
+    assert created is True
+    assert person_updates(queries) == []
+
+    # a field and a subobject change are stored with a single UPDATE
+    data["name"] = "Jane M. Smith"
+    data["links"][0]["url"] = "https://example.com/jane-smith"
+    with CaptureQueriesContext(connection) as queries:
+        created, updated = load_person(data)
+    assert updated is True
+    assert len(person_updates(queries)) == 1
+    p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
+    assert p.name == "Jane M. Smith"
+    assert subobject_tuples(p.links, "url") == [("https://example.com/jane-smith",)]
+
+
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_basic_person_subobjects():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -95,18 +212,21 @@ def test_basic_person_subobjects():
     other_names:
         - name: J. Smith
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
 
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
 
-    assert p.links.count() == 2
-    assert p.links.filter(note="some additional data").count() == 1
-    assert p.sources.count() == 1
-    assert p.other_names.count() == 1
+    assert subobject_tuples(p.links, "url", "note") == [
+        ("https://example.com/extra", "some additional data"),
+        ("https://example.com/jane", ""),
+    ]
+    assert subobject_tuples(p.sources, "url") == [("https://example.com/jane",)]
+    assert subobject_tuples(p.other_names, "name") == [("J. Smith",)]
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_subobject_update():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -116,7 +236,7 @@ def test_subobject_update():
         - url: https://example.com/extra
           note: some additional data
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
 
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
@@ -137,8 +257,10 @@ def test_subobject_update():
     assert created is False
     assert updated is True
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
-    assert p.links.count() == 2
-    assert p.links.filter(url="https://example.com/jane-smith").count() == 1
+    assert subobject_tuples(p.links, "url") == [
+        ("https://example.com/extra",),
+        ("https://example.com/jane-smith",),
+    ]
     assert p.updated_at > updated_at
 
     # delete a field
@@ -147,11 +269,12 @@ def test_subobject_update():
     assert created is False
     assert updated is True
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
-    assert p.links.count() == 1
+    assert subobject_tuples(p.links, "url") == [("https://example.com/jane-smith",)]
     assert p.updated_at > updated_at
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_subobject_duplicate():
     # this shouldn't actually be allowed most places (lint should catch)
     # but it was breaking committee imports when two members had the same name
@@ -162,7 +285,7 @@ def test_subobject_duplicate():
         - url: https://example.com/jane
         - url: https://example.com/jane
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
 
     # load twice, but second time no update should occur
     created, updated = load_person(data)
@@ -170,8 +293,20 @@ def test_subobject_duplicate():
     assert created is False
     assert updated is False
 
+    # replacing one of the duplicates is still an update
+    data["links"][1]["url"] = "https://example.com/extra"
+    created, updated = load_person(data)
+    assert created is False
+    assert updated is True
+    p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
+    assert subobject_tuples(p.links, "url") == [
+        ("https://example.com/extra",),
+        ("https://example.com/jane",),
+    ]
+
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_person_identifiers():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -185,17 +320,21 @@ def test_person_identifiers():
         - scheme: old_openstates
           identifier: AR000002
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
 
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
 
-    assert p.identifiers.count() == 4
-    assert p.identifiers.filter(scheme="old_openstates").count() == 2
-    assert p.identifiers.filter(scheme="twitter")[0].identifier == "fakeaccount"
+    assert subobject_tuples(p.identifiers, "scheme", "identifier") == [
+        ("old_openstates", "AR000001"),
+        ("old_openstates", "AR000002"),
+        ("twitter", "fakeaccount"),
+        ("youtube", "fakeYT"),
+    ]
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_person_contact_details():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -209,16 +348,22 @@ def test_person_contact_details():
         - note: home
           voice: 333-333-3333
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
 
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
 
-    assert p.contact_details.count() == 5
-    assert p.contact_details.filter(note="home").count() == 1
+    assert subobject_tuples(p.contact_details, "note", "type", "value") == [
+        ("Capitol Office office", "address", "123 Main St; Washington DC; 20001"),
+        ("Capitol Office office", "email", "fake@example.com"),
+        ("Capitol Office office", "fax", "111-222-3333"),
+        ("Capitol Office office", "voice", "555-555-5555"),
+        ("home", "voice", "333-333-3333"),
+    ]
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_person_party():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -226,13 +371,12 @@ def test_person_party():
     party:
         - name: Democratic
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
 
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
 
-    assert p.memberships.count() == 1
-    assert p.memberships.get().organization.name == "Democratic"
+    assert subobject_tuples(p.memberships, "organization__name") == [("Democratic",)]
     assert p.primary_party == "Democratic"
 
     data["party"].append({"name": "Republican", "end_date": "2018-10-06"})
@@ -240,11 +384,14 @@ def test_person_party():
     assert updated is True
     assert p.primary_party == "Democratic"
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
-    p.memberships.count() == 2
-    p.memberships.exclude(end_date="").count() == 1
+    assert subobject_tuples(p.memberships, "organization__name", "end_date") == [
+        ("Democratic", ""),
+        ("Republican", "2018-10-06"),
+    ]
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_person_legislative_roles():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -254,13 +401,11 @@ def test_person_legislative_roles():
           district: 3
           jurisdiction: ocd-jurisdiction/country:us/state:nc/government
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
 
-    assert p.memberships.count() == 1
-    assert p.memberships.get().organization.name == "House"
-    assert p.memberships.get().post.label == "3"
+    assert subobject_tuples(p.memberships, "organization__name", "post__label") == [("House", "3")]
     assert p.current_role == {
         "org_classification": "lower",
         "district": 3,
@@ -270,7 +415,8 @@ def test_person_legislative_roles():
     assert p.current_jurisdiction_id == "ocd-jurisdiction/country:us/state:nc/government"
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_person_governor_role():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -279,12 +425,11 @@ def test_person_governor_role():
         - type: governor
           jurisdiction: ocd-jurisdiction/country:us/state:nc/government
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
 
-    assert p.memberships.count() == 1
-    assert p.memberships.get().organization.name == "Executive"
+    assert subobject_tuples(p.memberships, "organization__name") == [("Executive",)]
     assert p.current_role == {
         "org_classification": "executive",
         "district": None,
@@ -294,7 +439,8 @@ def test_person_governor_role():
     assert p.current_jurisdiction_id == "ocd-jurisdiction/country:us/state:nc/government"
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_person_mayor_role():
     yaml_text = """
     id: abcdefab-0000-1111-2222-1234567890ab
@@ -303,7 +449,7 @@ def test_person_mayor_role():
         - type: mayor
           jurisdiction: ocd-jurisdiction/country:us/state:nc/place:cary/government
     """
-    data = yaml.safe_load(yaml_text)
+    data = parse_yaml(yaml_text)
     created, updated = load_person(data)
     p = Person.objects.get(pk="abcdefab-0000-1111-2222-1234567890ab")
 
@@ -322,9 +468,10 @@ def test_person_mayor_role():
 EXAMPLE_ORG_ID = "ocd-organization/00000000-1111-2222-3333-444455556666"
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_basic_organization():
-    data = yaml.safe_load(
+    data = parse_yaml(
         """
     id: ocd-organization/00000000-1111-2222-3333-444455556666
     name: Finance
@@ -342,9 +489,10 @@ def test_basic_organization():
     assert o.parent.name == "House"
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_basic_organization_updates():
-    data = yaml.safe_load(
+    data = parse_yaml(
         """
     id: ocd-organization/00000000-1111-2222-3333-444455556666
     name: Finance
@@ -374,9 +522,10 @@ def test_basic_organization_updates():
     assert o.updated_at > updated_at
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_organization_memberships():
-    data = yaml.safe_load(
+    data = parse_yaml(
         """
     id: ocd-organization/00000000-1111-2222-3333-444455556666
     name: Finance
@@ -398,8 +547,11 @@ def test_organization_memberships():
     created, updated = load_org(data)
     assert created is False
     assert updated is True
-    assert o.memberships.count() == 3
-    assert o.memberships.filter(role="Chairman")[0].person_name == "Another One"
+    assert subobject_tuples(o.memberships, "person_name", "role") == [
+        ("Another One", "Chairman"),
+        ("Jane Smith", "member"),
+        ("Noah Idy", "member"),
+    ]
 
     data["memberships"] = []
     created, updated = load_org(data)
@@ -408,11 +560,12 @@ def test_organization_memberships():
     assert o.memberships.count() == 0
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
 def test_org_person_membership_interaction():
     # this test ensure that committee memberships don't mess up person loading
     person_data = {"id": "123", "name": "Jane Smith"}
-    com_data = yaml.safe_load(
+    com_data = parse_yaml(
         """
     id: ocd-organization/00000000-1111-2222-3333-444455556666
     name: Finance
@@ -435,3 +588,238 @@ def test_org_person_membership_interaction():
     assert created is False
     assert updated is False
     assert o.memberships.count() == 1
+
+
+def test_sort_organizations():
+    orgs = [
+        ({"id": "ocd-organization/3", "parent": "ocd-organization/2"}, "c.yml"),
+        ({"id": "ocd-organization/2", "parent": "ocd-organization/1"}, "b.yml"),
+        ({"id": "ocd-organization/1", "parent": "upper"}, "a.yml"),
+        ({"id": "ocd-organization/4", "parent": "ocd-organization/0"}, "d.yml"),
+    ]
+    order = [filename for org, filename in sort_organizations(orgs)]
+    assert order.index("a.yml") < order.index("b.yml") < order.index("c.yml")
+    # parent not in this batch, assumed to already exist
+    assert "d.yml" in order
+
+
+def test_sort_organizations_cycle():
+    orgs = [
+        ({"id": "ocd-organization/1", "parent": "ocd-organization/2"}, "a.yml"),
+        ({"id": "ocd-organization/2", "parent": "ocd-organization/1"}, "b.yml"),
+    ]
+    with pytest.raises(AssertionError):
+        sort_organizations(orgs)
+
+
+def test_split_unchanged(tmp_path):
+    old = tmp_path / "Jane-Smith-abcdefab-0000-1111-2222-1234567890ab.yml"
+    new = tmp_path / "John-Smith-abcdefab-0000-1111-2222-1234567890ac.yml"
+    unknown = tmp_path / "Jo-Smith-abcdefab-0000-1111-2222-1234567890ad.yml"
+    for path in (old, new, unknown):
+        path.write_text("")
+    os.utime(old, (1000, 1000))
+    os.utime(new, (3000, 3000))
+    when = datetime.datetime.fromtimestamp(2000, datetime.timezone.utc)
+    updated_at = {
+        "ocd-person/abcdefab-0000-1111-2222-1234567890ab": when,
+        "ocd-person/abcdefab-0000-1111-2222-1234567890ac": when,
+    }
+
+    changed, unchanged_ids = _split_unchanged(
+        [str(old), str(new), str(unknown)], "ocd-person/", updated_at
+    )
+    assert changed == [str(new), str(unknown)]
+    assert unchanged_ids == {"ocd-person/abcdefab-0000-1111-2222-1234567890ab"}
+
+
+NC_ID = "ocd-jurisdiction/country:us/state:nc/government"
+PERSON_YAML = """
+id: ocd-person/abcdefab-0000-1111-2222-1234567890ab
+name: Jane Smith
+party:
+    - name: Democratic
+roles:
+    - type: lower
+      district: 1
+      jurisdiction: ocd-jurisdiction/country:us/state:nc/government
+links:
+    - url: https://example.com/jane
+"""
+
+
+def write_yaml(directory, *yaml_texts):
+    """ writes each text to a file named like utils.get_filename would, returns the paths """
+    directory.mkdir(exist_ok=True)
+    filenames = []
+    for text in yaml_texts:
+        uuid = parse_yaml(text)["id"].split("/")[1]
+        path = directory / f"Someone-{uuid}.yml"
+        path.write_text(text)
+        filenames.append(str(path))
+    return filenames
+
+
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
+def test_load_directory_unchanged(tmp_path, capsys):
+    other = PERSON_YAML.replace("1234567890ab", "1234567890ac").replace(
+        "district: 1", "district: 2"
+    )
+    files = write_yaml(tmp_path, PERSON_YAML, other)
+
+    load_directory(files, "person", NC_ID, purge=False)
+    assert "processed 2 person files, 2 created, 0 updated" in capsys.readouterr().out
+
+    # loaded again with everything prefetched, nothing changes
+    load_directory(files, "person", NC_ID, purge=False)
+    assert "processed 2 person files, 0 created, 0 updated" in capsys.readouterr().out
+    p = Person.objects.get(pk="ocd-person/abcdefab-0000-1111-2222-1234567890ac")
+    assert subobject_tuples(p.memberships, "organization__name", "post__label") == [
+        ("Democratic", None),
+        ("House", "2"),
+    ]
+    assert p.primary_party == "Democratic"
+
+
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
+def test_load_directory_legacy_district(tmp_path, capsys, monkeypatch):
+    monkeypatch.setattr(
+        "to_database.legacy_districts", lambda **kwargs: {"lower": ["9"], "upper": []}
+    )
+    legacy = PERSON_YAML.replace("district: 1", "district: '9'\n      end_date: 2010-01-01")
+    files = write_yaml(tmp_path, legacy)
+
+    load_directory(files, "person", NC_ID, purge=False)
+    p = Person.objects.get(pk="ocd-person/abcdefab-0000-1111-2222-1234567890ab")
+    assert subobject_tuples(p.memberships, "organization__name", "post__label") == [
+        ("Democratic", None),
+        ("House", None),
+    ]
+
+    # districts that aren't posts or legacy districts are still an error
+    write_yaml(tmp_path, legacy.replace("'9'", "'8'"))
+    with pytest.raises(CancelTransaction):
+        load_directory(files, "person", NC_ID, purge=False)
+    assert "no such post" in capsys.readouterr().out
+
+
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
+def test_load_directory_unknown_party(tmp_path, capsys):
+    files = write_yaml(tmp_path, PERSON_YAML.replace("Democratic", "Whig"))
+
+    with pytest.raises(CancelTransaction):
+        load_directory(files, "person", NC_ID, purge=False)
+    assert "no such party Whig" in capsys.readouterr().out
+
+
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
+def test_load_directory_merge(tmp_path, capsys):
+    old_id = "ocd-person/abcdefab-0000-1111-2222-1234567890aa"
+    old_yaml = PERSON_YAML.replace("1234567890ab", "1234567890aa")
+    load_directory(write_yaml(tmp_path / "old", old_yaml), "person", NC_ID, purge=False)
+
+    house = Organization.objects.get(classification="lower")
+    session = LegislativeSession.objects.create(
+        jurisdiction_id=NC_ID, identifier="2019", name="2019", start_date="2019", end_date="2020"
+    )
+    bill = Bill.objects.create(
+        legislative_session=session, identifier="HB 1", title="A Bill", from_organization=house
+    )
+    bill.sponsorships.create(name="Smith", person_id=old_id, classification="primary")
+    vote = VoteEvent.objects.create(
+        motion_text="passage",
+        start_date="2019-01-01",
+        result="pass",
+        organization=house,
+        legislative_session=session,
+        bill=bill,
+    )
+    vote.votes.create(option="yes", voter_name="Smith", voter_id=old_id)
+
+    # the new file claims the old id, so its bills and votes move over
+    new_yaml = (
+        PERSON_YAML + f"other_identifiers:\n    - scheme: openstates\n      identifier: {old_id}\n"
+    )
+    load_directory(write_yaml(tmp_path / "new", new_yaml), "person", NC_ID, purge=False)
+
+    assert "1 removed via merge" in capsys.readouterr().out
+    assert not Person.objects.filter(pk=old_id).exists()
+    new_id = "ocd-person/abcdefab-0000-1111-2222-1234567890ab"
+    assert list(bill.sponsorships.values_list("person_id", flat=True)) == [new_id]
+    assert list(vote.votes.values_list("voter_id", flat=True)) == [new_id]
+
+
+def test_lapsed_ids():
+    updated_at = {
+        "ocd-person/1": datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc),
+        "ocd-person/2": datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc),
+        "ocd-person/3": datetime.datetime(2019, 1, 1, tzinfo=datetime.timezone.utc),
+    }
+    end_dates = [
+        # ended since the last update
+        ("ocd-person/1", "2019-06-01"),
+        # had already ended, or hasn't ended yet
+        ("ocd-person/2", "2018-12-31"),
+        ("ocd-person/3", "2099-01-01"),
+        # not loaded before
+        ("ocd-person/4", "2019-06-01"),
+    ]
+    assert _lapsed_ids(updated_at, end_dates) == {"ocd-person/1"}
+
+
+@pytest.mark.django_db(transaction=False)
+@pytest.mark.usefixtures("base_db")
+def test_load_directory_incremental_lapsed_role(tmp_path, capsys):
+    yesterday = (datetime.date.today() - datetime.timedelta(days=1)).isoformat()
+    lapsed = PERSON_YAML.replace("district: 1", f"district: 1\n      end_date: '{yesterday}'")
+    current = PERSON_YAML.replace("1234567890ab", "1234567890ac").replace(
+        "district: 1", "district: 2"
+    )
+    files = write_yaml(tmp_path, lapsed, current)
+    load_directory(files, "person", NC_ID, purge=False)
+
+    # as if both were last loaded a week ago, while the role was still current
+    week_ago = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=7)
+    for filename in files:
+        os.utime(filename, (week_ago.timestamp() - 60,) * 2)
+    lapsed_id = "ocd-person/abcdefab-0000-1111-2222-1234567890ab"
+    Person.objects.update(updated_at=week_ago)
+    Person.objects.filter(pk=lapsed_id).update(current_role={"org_classification": "lower"})
+    capsys.readouterr()
+
+    # the unchanged file is skipped, but the lapsed role is still picked up
+    load_directory(files, "person", NC_ID, purge=False, incremental=True)
+    assert "skipping 1 unchanged person files" in capsys.readouterr().out
+    assert Person.objects.get(pk=lapsed_id).current_role is None
+
+
+def test_to_database_jobs_output(monkeypatch):
+    def fake_load_jurisdiction(abbr, *args):
+        for n in range(3):
+            click.secho(f"{abbr} message {n}")
+            # give the other jurisdictions a chance to print in between
+            time.sleep(0.01)
+        if abbr == "ak":
+            click.secho(f"{abbr} went wrong", fg="red")
+            raise CancelTransaction()
+
+    monkeypatch.setattr(to_database, "init_django", lambda: None)
+    monkeypatch.setattr(to_database, "create_parties", lambda: None)
+    monkeypatch.setattr(to_database, "_parse_pool", lambda jobs: None)
+    monkeypatch.setattr(to_database, "load_jurisdiction", fake_load_jurisdiction)
+
+    result = CliRunner().invoke(to_database.to_database, ["ak", "nc", "wy", "--jobs", "3"])
+    assert result.exit_code == 1
+    lines = result.output.splitlines()
+    assert lines[-1] == "cancelled: ak"
+
+    # each jurisdiction's messages come out together, not interleaved with the others
+    for abbr in ("ak", "nc", "wy"):
+        first = lines.index(f"{abbr} message 0")
+        for n in range(3):
+            assert lines[first + n] == f"{abbr} message {n}"
+    assert lines[lines.index("ak message 0") + 3] == "ak went wrong"
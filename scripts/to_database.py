@@ -1,9 +1,16 @@
 #!/usr/bin/env python
+import io
 import os
+import mmap
+import multiprocessing
+import re
 import sys
-import glob
-from functools import lru_cache
-from django.db import transaction
+import threading
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache, partial
+from django.db import connections, transaction
+from django.db.models import Case, CharField, Value, When
 import click
 from openstates import metadata
 from openstates.utils.django import init_django
@@ -19,17 +26,56 @@ from utils import (
 )
 
 
+# filenames end in the uuid portion of the object's id, see utils.get_filename
+FILENAME_UUID_RE = re.compile(
+    r"([0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12})\.yml$"
+)
+
+# directories with fewer files than this are parsed in-process, the pool's overhead isn't worth it
+PARALLEL_PARSE_MIN_FILES = 500
+
+# files at least this many bytes are parsed through mmap instead of read()
+MMAP_THRESHOLD = 4096
+
+
 class CancelTransaction(Exception):
     pass
 
 
-@lru_cache(128)
+@lru_cache(maxsize=None)
 def cached_lookup(ModelCls, **kwargs):
     return ModelCls.objects.get(**kwargs)
 
 
+def _subobjects_match(ModelCls, rows, objects):
+    """ returns True if rows hold exactly the field values given in objects """
+    names = sorted({key for obj in objects for key in obj})
+    fields = [ModelCls._meta.get_field(name) for name in names]
+
+    def from_obj(obj):
+        values = []
+        for field in fields:
+            if field.name not in obj:
+                # missing keys get the model default, just like on create
+                values.append(field.get_default())
+            elif field.is_relation:
+                values.append(getattr(obj[field.name], "pk", obj[field.name]))
+            else:
+                values.append(field.to_python(obj[field.name]))
+        return tuple(values)
+
+    def from_row(row):
+        return tuple(getattr(row, field.attname) for field in fields)
+
+    return Counter(map(from_row, rows)) == Counter(map(from_obj, objects))
+
+
 def update_subobjects(person, fieldname, objects, read_manager=None):
-    """ returns True if there are any updates """
+    """
+    returns True if there are any updates
+
+    the caller is responsible for saving person afterwards to bump updated_at
+    """
     # we need the default manager for this field in case we need to do updates
     manager = getattr(person, fieldname)
 
@@ -38,52 +84,71 @@ def update_subobjects(person, fieldname, objects, read_manager=None):
     if read_manager is None:
         read_manager = manager
 
-    current_count = read_manager.count()
+    current = list(read_manager.all())
+    current_count = len(current)
     updated = False
 
     # if counts differ, we need to do an update for sure
     if current_count != len(objects):
         updated = True
 
-    # check if all objects exist
+    # check if all objects exist, comparing in Python instead of chaining excludes
     if not updated:
-        qs = read_manager
-        for obj in objects:
-            qs = qs.exclude(**obj)
-
-        if qs.exists():
-            updated = True
+        updated = not _subobjects_match(manager.model, current, objects)
 
-    # if there's been an update, wipe the old & insert the new
+    # if there's been an update, wipe the old & insert the new (all or nothing)
+    # no savepoint: load_directory already wraps everything in a transaction that is rolled back
+    # as a whole on failure
     if updated:
-        if current_count:
-            read_manager.all().delete()
-        for obj in objects:
-            manager.create(**obj)
-        # save to bump updated_at timestamp
-        person.save()
+        with transaction.atomic(savepoint=False):
+            if current_count:
+                read_manager.all().delete()
+            ModelCls = manager.model
+            ModelCls.objects.bulk_create(
+                [ModelCls(**{manager.field.name: person}, **obj) for obj in objects],
+                batch_size=500,
+            )
+        # drop rows prefetched by load_directory, they no longer match the database
+        getattr(person, "_prefetched_objects_cache", {}).pop(fieldname, None)
 
     return updated
 
 
-def get_update_or_create(ModelCls, data, lookup_keys):
-    updated = created = False
+def get_update_or_create(ModelCls, data, lookup_keys, existing=None):
+    """
+    returns (obj, created, changed)
+
+    changed lists the fields of an existing obj that were set from data, they aren't saved so
+    that the caller can save obj once when it's done with it
+
+    existing can be a dict of already loaded objects by id, consulted before the DB
+    """
+    created = False
+    changed = []
     kwargs = {k: data[k] for k in lookup_keys}
     try:
-        obj = ModelCls.objects.get(**kwargs)
-        for field, value in data.items():
-            if getattr(obj, field) != value:
-                setattr(obj, field, value)
-                updated = True
-        if updated:
-            obj.save()
+        obj = existing.get(data["id"]) if existing else None
+        if obj is None:
+            obj = ModelCls.objects.get(**kwargs)
+        # compare against the raw loaded values, relations by their id, so that nothing is fetched
+        for key, value in data.items():
+            field = ModelCls._meta.get_field(key)
+            raw = getattr(value, "pk", value) if field.is_relation and key == field.name else value
+            if obj.__dict__.get(field.attname) != raw:
+                setattr(obj, key, value)
+                changed.append(field.name)
     except ModelCls.DoesNotExist:
         obj = ModelCls.objects.create(**data)
         created = True
-    return obj, created, updated
+    return obj, created, changed
 
 
-def load_person(data):
+def load_person(data, existing=None, parties=None, posts=None):
+    """
+    existing: optional dict of Person objects by id, with their subobjects prefetched
+    parties: optional dict of party Organization objects by name
+    posts: optional dict of Post objects by label, keyed by chamber Organization id
+    """
     # import has to be here so that Django is set up
     from openstates.data.models import Person, Organization, Post
 
@@ -99,27 +164,6 @@ def load_person(data):
         image=data.get("image", ""),
         extras=data.get("extras", {}),
     )
-    person, created, updated = get_update_or_create(Person, fields, ["id"])
-
-    updated |= update_subobjects(person, "other_names", data.get("other_names", []))
-    updated |= update_subobjects(person, "links", data.get("links", []))
-    updated |= update_subobjects(person, "sources", data.get("sources", []))
-
-    identifiers = []
-    for scheme, value in data.get("ids", {}).items():
-        identifiers.append({"scheme": scheme, "identifier": value})
-    for identifier in data.get("other_identifiers", []):
-        identifiers.append(identifier)
-    updated |= update_subobjects(person, "identifiers", identifiers)
-
-    contact_details = []
-    for cd in data.get("contact_details", []):
-        for type in ("address", "email", "voice", "fax"):
-            if cd.get(type):
-                contact_details.append(
-                    {"note": cd.get("note", ""), "type": type, "value": cd[type]}
-                )
-    updated |= update_subobjects(person, "contact_details", contact_details)
 
     memberships = []
     primary_party = ""
@@ -128,8 +172,11 @@ def load_person(data):
     for party in data.get("party", []):
         party_name = party["name"]
         try:
-            org = cached_lookup(Organization, classification="party", name=party["name"])
-        except Organization.DoesNotExist:
+            if parties is None:
+                org = cached_lookup(Organization, classification="party", name=party_name)
+            else:
+                org = parties[party_name]
+        except (KeyError, Organization.DoesNotExist):
             click.secho(f"no such party {party['name']}", fg="red")
             raise CancelTransaction()
         memberships.append(
@@ -167,13 +214,18 @@ def load_person(data):
             org = cached_lookup(
                 Organization, classification=org_type, jurisdiction_id=role["jurisdiction"]
             )
-            if use_district:
+            if use_district and posts is not None and org.id in posts:
+                try:
+                    post = posts[org.id][str(role["district"])]
+                except KeyError:
+                    raise Post.DoesNotExist()
+            elif use_district:
                 post = org.posts.get(label=role["district"])
             else:
                 post = None
         except Organization.DoesNotExist:
             click.secho(
-                f"{person} no such organization {role['jurisdiction']} {org_type}", fg="red"
+                f"{data['name']} no such organization {role['jurisdiction']} {org_type}", fg="red",
             )
             raise CancelTransaction()
         except Post.DoesNotExist:
@@ -217,26 +269,47 @@ def load_person(data):
             membership["role"] = role_name
         memberships.append(membership)
 
+    # computed fields are stored along with the rest
+    fields.update(
+        primary_party=primary_party,
+        current_role=current_role,
+        current_jurisdiction_id=current_jurisdiction_id,
+    )
+    person, created, changed = get_update_or_create(Person, fields, ["id"], existing)
+
+    subobjects_updated = update_subobjects(person, "other_names", data.get("other_names", []))
+    subobjects_updated |= update_subobjects(person, "links", data.get("links", []))
+    subobjects_updated |= update_subobjects(person, "sources", data.get("sources", []))
+
+    identifiers = []
+    for scheme, value in data.get("ids", {}).items():
+        identifiers.append({"scheme": scheme, "identifier": value})
+    for identifier in data.get("other_identifiers", []):
+        identifiers.append(identifier)
+    subobjects_updated |= update_subobjects(person, "identifiers", identifiers)
+
+    contact_details = []
+    for cd in data.get("contact_details", []):
+        for type in ("address", "email", "voice", "fax"):
+            if cd.get(type):
+                contact_details.append(
+                    {"note": cd.get("note", ""), "type": type, "value": cd[type]}
+                )
+    subobjects_updated |= update_subobjects(person, "contact_details", contact_details)
+
     # note that we don't manage committee memberships here
-    updated |= update_subobjects(
+    subobjects_updated |= update_subobjects(
         person,
         "memberships",
         memberships,
         read_manager=person.memberships.exclude(organization__classification="committee"),
     )
 
-    # set computed fields (avoid extra save)
-    if (
-        person.primary_party != primary_party
-        or person.current_role != current_role
-        or person.current_jurisdiction_id != current_jurisdiction_id
-    ):
-        person.primary_party = primary_party
-        person.current_role = current_role
-        person.current_jurisdiction_id = current_jurisdiction_id
-        person.save()
+    # save once to store changed fields and bump updated_at, new people are already up to date
+    if changed or (subobjects_updated and not created):
+        person.save(update_fields=changed + ["updated_at"])
 
-    return created, updated
+    return created, bool(changed) or subobjects_updated
 
 
 def load_org(data):
@@ -257,10 +330,10 @@ def load_org(data):
         classification=data["classification"],
         parent=parent,
     )
-    org, created, updated = get_update_or_create(Organization, fields, ["id"])
+    org, created, changed = get_update_or_create(Organization, fields, ["id"])
 
-    updated |= update_subobjects(org, "links", data.get("links", []))
-    updated |= update_subobjects(org, "sources", data.get("sources", []))
+    subobjects_updated = update_subobjects(org, "links", data.get("links", []))
+    subobjects_updated |= update_subobjects(org, "sources", data.get("sources", []))
 
     memberships = []
     for role in data.get("memberships", []):
@@ -282,27 +355,35 @@ def load_org(data):
                 "end_date": role.get("end_date", ""),
             }
         )
-    updated |= update_subobjects(org, "memberships", memberships)
+    subobjects_updated |= update_subobjects(org, "memberships", memberships)
+
+    # save once to store changed fields and bump updated_at, new orgs are already up to date
+    if changed or (subobjects_updated and not created):
+        org.save(update_fields=changed + ["updated_at"])
 
-    return created, updated
+    return created, bool(changed) or subobjects_updated
 
 
 def sort_organizations(orgs):
-    order = []
-    seen = set()
-    how_many = len(orgs)
+    """ orders (org, filename) pairs so that parents always come before their children """
+    ids = {org["id"] for org, filename in orgs}
+    children = defaultdict(list)
+    queue = deque()
+    for org, filename in orgs:
+        # parents that aren't part of this batch (chambers, existing orgs) are already loaded
+        if org["parent"] in ids:
+            children[org["parent"]].append((org, filename))
+        else:
+            queue.append((org, filename))
 
-    while orgs:
-        for org, filename in list(orgs):
-            if (org["parent"].startswith("ocd-organization") and org["parent"] in seen) or not org[
-                "parent"
-            ].startswith("ocd-organization"):
-                seen.add(org["id"])
-                order.append((org, filename))
-                orgs.remove((org, filename))
+    order = []
+    while queue:
+        org, filename = queue.popleft()
+        order.append((org, filename))
+        queue.extend(children.pop(org["id"], []))
 
-    # TODO: this doesn't check for infinite loops when two orgs refer to one another
-    assert len(order) == how_many
+    # anything left over is part of a cycle
+    assert len(order) == len(orgs)
 
     return order
 
@@ -314,40 +395,151 @@ def _echo_org_status(org, created, updated):
         click.secho(f"{org} updated", fg="yellow")
 
 
-def load_directory(files, type, jurisdiction_id, purge):
+def _yaml_files(directory):
+    """ returns paths of the .yml files in directory, or [] if it doesn't exist """
+    try:
+        with os.scandir(directory) as entries:
+            return [
+                entry.path
+                for entry in entries
+                if entry.name.endswith(".yml")
+                and not entry.name.startswith(".")
+                and entry.is_file()
+            ]
+    except FileNotFoundError:
+        return []
+
+
+def _parse_yaml_file(filename):
+    with open(filename, "rb") as f:
+        # small files are cheaper to read outright than to map
+        if os.fstat(f.fileno()).st_size < MMAP_THRESHOLD:
+            return load_yaml(f.read()), filename
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return load_yaml(mm), filename
+
+
+def _split_unchanged(files, id_prefix, updated_at):
+    """
+    returns (changed files, ids of unchanged objects)
+
+    a file is unchanged if it wasn't modified since its object (found by the uuid at the end of
+    the filename) was last updated in the database
+    """
+    changed = []
+    unchanged_ids = set()
+    for filename in files:
+        match = FILENAME_UUID_RE.search(filename)
+        obj_id = id_prefix + match.group(1) if match else None
+        if obj_id in updated_at and os.stat(filename).st_mtime <= updated_at[obj_id].timestamp():
+            unchanged_ids.add(obj_id)
+        else:
+            changed.append(filename)
+    return changed, unchanged_ids
+
+
+def _lapsed_ids(updated_at, end_dates):
+    """
+    returns ids with a role or party that has ended since they were last updated
+
+    (id, end_date) pairs come from end_dates, these people's computed fields (current_role, ...)
+    depend on today's date and so are out of date even if their file is unchanged
+    """
+    return {
+        obj_id
+        for obj_id, end_date in end_dates
+        if obj_id in updated_at
+        and end_date > updated_at[obj_id].date().isoformat()
+        and not role_is_active({"end_date": end_date})
+    }
+
+
+def _merged_id_case(field, merged):
+    """ returns an expression mapping each old id in field to its new id """
+    return Case(
+        *[When(**{field: old}, then=Value(new)) for old, new in merged.items()],
+        output_field=CharField(),
+    )
+
+
+def load_directory(
+    files, type, jurisdiction_id, purge, incremental=False, verbose=False, parse_pool=None
+):
     ids = set()
     merged = {}
     created_count = 0
     updated_count = 0
+    # per-file messages are collected and written at once instead of a line at a time
+    lines = []
 
     if type == "person":
-        from openstates.data.models import Person, BillSponsorship, PersonVote
+        from openstates.data.models import (
+            Person,
+            Membership,
+            Organization,
+            Post,
+            BillSponsorship,
+            PersonVote,
+        )
 
-        existing_ids = set(
-            Person.objects.filter(
+        # load everyone up front with their subobjects instead of a few queries per file
+        existing = {
+            p.id: p
+            for p in Person.objects.filter(
                 memberships__organization__jurisdiction_id=jurisdiction_id
-            ).values_list("id", flat=True)
-        )
+            )
+            .distinct()
+            .prefetch_related("other_names", "links", "sources", "identifiers", "contact_details")
+        }
+        existing_ids = set(existing)
+        updated_at = {p.id: p.updated_at for p in existing.values()}
+        id_prefix = "ocd-person/"
+        parties = {org.name: org for org in Organization.objects.filter(classification="party")}
+        posts = defaultdict(dict)
+        for post in Post.objects.filter(
+            organization__jurisdiction_id=jurisdiction_id,
+            organization__classification__in=("upper", "lower", "legislature"),
+        ):
+            posts[post.organization_id][post.label] = post
         ModelCls = Person
-        load_func = load_person
+        load_func = partial(load_person, existing=existing, parties=parties, posts=posts)
     elif type == "organization":
         from openstates.data.models import Organization
 
-        existing_ids = set(
+        # stream the rows rather than having the driver buffer the whole result
+        updated_at = dict(
             Organization.objects.filter(
                 jurisdiction_id=jurisdiction_id, classification="committee"
-            ).values_list("id", flat=True)
+            )
+            .values_list("id", "updated_at")
+            .iterator(chunk_size=2000)
         )
+        existing_ids = set(updated_at)
+        id_prefix = "ocd-organization/"
         ModelCls = Organization
         load_func = load_org
     else:
         raise ValueError(type)
 
-    all_data = []
-    for filename in files:
-        with open(filename) as f:
-            data = load_yaml(f)
-            all_data.append((data, filename))
+    if incremental:
+        if type == "person":
+            end_dates = (
+                Membership.objects.filter(person_id__in=updated_at)
+                .exclude(organization__classification="committee")
+                .exclude(end_date="")
+                .values_list("person_id", "end_date")
+            )
+            lapsed_ids = _lapsed_ids(updated_at, end_dates)
+            updated_at = {k: v for k, v in updated_at.items() if k not in lapsed_ids}
+        files, unchanged_ids = _split_unchanged(files, id_prefix, updated_at)
+        ids.update(unchanged_ids)
+        click.secho(f"skipping {len(unchanged_ids)} unchanged {type} files")
+
+    # parsing is independent per file, but handing it to a pool only pays off for many files
+    if parse_pool is not None and len(files) >= PARALLEL_PARSE_MIN_FILES:
+        all_data = list(parse_pool.map(_parse_yaml_file, files, chunksize=32))
+    else:
+        all_data = [_parse_yaml_file(filename) for filename in files]
 
     if type == "organization":
         all_data = sort_organizations(all_data)
@@ -357,12 +549,17 @@ def load_directory(files, type, jurisdiction_id, purge):
         created, updated = load_func(data)
 
         if created:
-            click.secho(f"created {type} from {filename}", fg="cyan", bold=True)
+            if verbose:
+                lines.append(click.style(f"created {type} from {filename}", fg="cyan", bold=True))
             created_count += 1
         elif updated:
-            click.secho(f"updated {type} from {filename}", fg="cyan")
+            if verbose:
+                lines.append(click.style(f"updated {type} from {filename}", fg="cyan"))
             updated_count += 1
 
+    if lines:
+        click.echo("\n".join(lines))
+
     missing_ids = existing_ids - ids
 
     # check if missing ids are in need of a merge
@@ -379,10 +576,15 @@ def load_directory(files, type, jurisdiction_id, purge):
         click.secho(f"{len(merged)} removed via merge", fg="yellow")
         for old, new in merged.items():
             click.secho(f"   {old} => {new}", fg="yellow")
-            BillSponsorship.objects.filter(person_id=old).update(person_id=new)
-            PersonVote.objects.filter(voter_id=old).update(voter_id=new)
-            ModelCls.objects.filter(id=old).delete()
-            missing_ids.remove(old)
+        # repoint everything in one UPDATE per table rather than one per merged id
+        BillSponsorship.objects.filter(person_id__in=merged).update(
+            person_id=_merged_id_case("person_id", merged)
+        )
+        PersonVote.objects.filter(voter_id__in=merged).update(
+            voter_id=_merged_id_case("voter_id", merged)
+        )
+        ModelCls.objects.filter(id__in=merged).delete()
+        missing_ids -= merged.keys()
 
     # ids that are still missing would need to be purged
     if missing_ids and not purge:
@@ -431,6 +633,108 @@ def create_municipalities(jurisdictions):
             click.secho(f"created organization: {o.name}", fg="green")
 
 
+def load_jurisdiction(abbr, purge, safe, incremental, verbose, parse_pool=None):
+    """ loads one jurisdiction in its own transaction, raises CancelTransaction to roll back """
+    click.secho("==== {} ====".format(abbr), bold=True)
+    directory = get_data_dir(abbr)
+    jurisdiction_id = get_jurisdiction_id(abbr)
+    municipalities = load_municipalities(abbr)
+
+    with transaction.atomic():
+        create_municipalities(municipalities)
+
+    person_files = [
+        filename
+        for subdir in ("legislature", "executive", "municipalities", "retired")
+        for filename in _yaml_files(os.path.join(directory, subdir))
+    ]
+    committee_files = _yaml_files(os.path.join(directory, "organizations"))
+
+    if safe:
+        click.secho("running in safe mode, no changes will be made", fg="magenta")
+
+    with transaction.atomic():
+        load_directory(
+            person_files,
+            "person",
+            jurisdiction_id,
+            purge=purge,
+            incremental=incremental,
+            verbose=verbose,
+            parse_pool=parse_pool,
+        )
+        load_directory(
+            committee_files,
+            "organization",
+            jurisdiction_id,
+            purge=purge,
+            incremental=incremental,
+            verbose=verbose,
+            parse_pool=parse_pool,
+        )
+        if safe:
+            click.secho("ran in safe mode, no changes were made", fg="magenta")
+            raise CancelTransaction()
+
+
+def _parse_pool(jobs):
+    """ returns a process pool for parsing YAML, or None if there's only one CPU """
+    if (os.cpu_count() or 1) < 2:
+        return None
+    # forking from a multithreaded process isn't safe, with --jobs have the workers forked
+    # from a single-threaded server process instead
+    return ProcessPoolExecutor(
+        mp_context=multiprocessing.get_context("forkserver" if jobs > 1 else None)
+    )
+
+
+class _ThreadBufferedOutput:
+    """
+    stands in for sys.stdout while jurisdictions load in threads
+
+    output from a thread that has started a buffer is held until it calls flush_buffer(), so that
+    each jurisdiction's messages are printed together instead of interleaved
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def start_buffer(self):
+        self._local.buffer = io.StringIO()
+
+    def flush_buffer(self):
+        buffer, self._local.buffer = self._local.buffer, None
+        with self._lock:
+            self._stream.write(buffer.getvalue())
+            self._stream.flush()
+
+    def write(self, text):
+        buffer = getattr(self._local, "buffer", None)
+        if buffer is not None:
+            return buffer.write(text)
+        with self._lock:
+            return self._stream.write(text)
+
+    def flush(self):
+        if getattr(self._local, "buffer", None) is None:
+            self._stream.flush()
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _load_jurisdiction_in_thread(output, *args):
+    output.start_buffer()
+    try:
+        load_jurisdiction(*args)
+    finally:
+        # each thread gets its own database connection, don't leave them open
+        connections.close_all()
+        output.flush_buffer()
+
+
 @click.command()
 @click.argument("abbreviations", nargs=-1)
 @click.option(
@@ -441,7 +745,21 @@ def create_municipalities(jurisdictions):
     default=False,
     help="Operate in safe mode, no changes will be written to database.",
 )
-def to_database(abbreviations, purge, safe):
+@click.option(
+    "--incremental/--no-incremental",
+    default=False,
+    help="Skip YAML files that haven't been modified since their object was last updated.",
+)
+@click.option(
+    "--verbose/--no-verbose", default=False, help="List each person/organization file loaded."
+)
+@click.option(
+    "--jobs",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Number of jurisdictions to load concurrently.",
+)
+def to_database(abbreviations, purge, safe, incremental, verbose, jobs):
     """
     Sync YAML files to DB.
     """
@@ -452,35 +770,47 @@ def to_database(abbreviations, purge, safe):
     if not abbreviations:
         abbreviations = get_all_abbreviations()
 
-    for abbr in abbreviations:
-        click.secho("==== {} ====".format(abbr), bold=True)
-        directory = get_data_dir(abbr)
-        jurisdiction_id = get_jurisdiction_id(abbr)
-        municipalities = load_municipalities(abbr)
-
-        with transaction.atomic():
-            create_municipalities(municipalities)
-
-        person_files = (
-            glob.glob(os.path.join(directory, "legislature/*.yml"))
-            + glob.glob(os.path.join(directory, "executive/*.yml"))
-            + glob.glob(os.path.join(directory, "municipalities/*.yml"))
-            + glob.glob(os.path.join(directory, "retired/*.yml"))
-        )
-        committee_files = glob.glob(os.path.join(directory, "organizations/*.yml"))
-
-        if safe:
-            click.secho("running in safe mode, no changes will be made", fg="magenta")
-
-        try:
-            with transaction.atomic():
-                load_directory(person_files, "person", jurisdiction_id, purge=purge)
-                load_directory(committee_files, "organization", jurisdiction_id, purge=purge)
-                if safe:
-                    click.secho("ran in safe mode, no changes were made", fg="magenta")
-                    raise CancelTransaction()
-        except CancelTransaction:
-            sys.exit(1)
+    # one pool for the whole run rather than one per directory
+    parse_pool = _parse_pool(jobs)
+    stdout = sys.stdout
+    try:
+        if jobs == 1:
+            for abbr in abbreviations:
+                try:
+                    load_jurisdiction(abbr, purge, safe, incremental, verbose, parse_pool)
+                except CancelTransaction:
+                    sys.exit(1)
+            return
+
+        failed = []
+        sys.stdout = output = _ThreadBufferedOutput(sys.stdout)
+        with ThreadPoolExecutor(max_workers=min(jobs, len(abbreviations))) as executor:
+            futures = {
+                abbr: executor.submit(
+                    _load_jurisdiction_in_thread,
+                    output,
+                    abbr,
+                    purge,
+                    safe,
+                    incremental,
+                    verbose,
+                    parse_pool,
+                )
+                for abbr in abbreviations
+            }
+            for abbr, future in futures.items():
+                try:
+                    future.result()
+                except CancelTransaction:
+                    failed.append(abbr)
+    finally:
+        sys.stdout = stdout
+        if parse_pool is not None:
+            parse_pool.shutdown()
+
+    if failed:
+        click.secho(f"cancelled: {', '.join(failed)}", fg="red")
+        sys.exit(1)
 
 
 if __name__ == "__main__":
@@ -6,12 +6,30 @@ import datetime
 import yaml
 import yamlordereddictloader
 from collections import defaultdict
+from functools import lru_cache
 from yaml.representer import Representer
 from openstates import metadata
 
 # set up defaultdict representation
 yaml.add_representer(defaultdict, Representer.represent_dict)
 
+# use libyaml's parser when PyYAML was built with it
+try:
+    _SafeLoader = yaml.CSafeLoader
+except AttributeError:  # pragma: no cover
+    _SafeLoader = yaml.SafeLoader
+
+
+class OrderedSafeLoader(_SafeLoader):
+    """ equivalent of yamlordereddictloader.SafeLoader on top of _SafeLoader """
+
+    construct_yaml_map = yamlordereddictloader.construct_yaml_map
+    construct_mapping = yamlordereddictloader.construct_mapping
+
+
+OrderedSafeLoader.add_constructor("tag:yaml.org,2002:map", OrderedSafeLoader.construct_yaml_map)
+OrderedSafeLoader.add_constructor("tag:yaml.org,2002:omap", OrderedSafeLoader.construct_yaml_map)
+
 # can only have one of these at a time
 MAJOR_PARTIES = ("Democratic", "Republican", "Independent")
 
@@ -67,7 +85,7 @@ def get_jurisdiction_id(abbr):
 
 
 def load_yaml(file_obj):
-    return yaml.load(file_obj, Loader=yamlordereddictloader.SafeLoader)
+    return yaml.load(file_obj, Loader=OrderedSafeLoader)
 
 
 def iter_objects(abbr, objtype):
@@ -99,6 +117,7 @@ def role_is_active(role):
     return str(role.get("end_date")) is None or str(role.get("end_date")) > now
 
 
+@lru_cache(maxsize=None)
 def legacy_districts(**kwargs):
     """ can take jurisdiction_id or abbr via kwargs """
     legacy_districts = {"upper": [], "lower": []}